@@ -6,19 +6,22 @@ Minimal Twitch Chat Bot using AutoBot
 """
 import asyncio
 import logging
+import re
 import aiohttp
+from collections import OrderedDict
 from typing import Dict, TYPE_CHECKING
 import random
-from database import setup_database
+from database import setup_database, load_player_messages, save_player_messages
 from elevenlabs import play
-from urllib.parse import quote
+from urllib.parse import quote_plus
 import asqlite
 import twitchio
 from twitchio import eventsub
 from twitchio.ext import commands
 from config import (
     CLIENT_ID, CLIENT_SECRET, BOT_ID, OWNER_ID, JUDGE_CLOUD_FUNCTION_URL, SPEECH_ENABLED,
-    MESSAGE_MAX_LENGTH, POST_INTERVAL_SECONDS, JUDGE_CLOUD_FUNCTION_TOKEN, SERVER_URL
+    MESSAGE_MAX_LENGTH, POST_INTERVAL_SECONDS, JUDGE_CLOUD_FUNCTION_TOKEN, SERVER_URL, MAX_PLAYER_MESSAGES,
+    READ_DELAY_SECONDS
 )
 from game_state import game_state, Fighter
 
@@ -26,20 +29,48 @@ if TYPE_CHECKING:
     import sqlite3
 
 # Setup logging
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=logging.WARNING)
 LOGGER = logging.getLogger(__name__)
 
+# Player placeholders in cloud function responses
+_P_RE = re.compile(r"P([12])")
+# Owner command to start a new game, e.g. "game Olivia vs Athena"
+_GAME_RE = re.compile(r"^game (.*) vs (.*)$", re.IGNORECASE)
+
+# Cloud function headers only differ by role
+_JUDGE_HEADERS = {"Content-Type": "application/json", "Authorization": f"Bearer {JUDGE_CLOUD_FUNCTION_TOKEN}", "x-role": "judge"}
+_SUMMARY_HEADERS = {**_JUDGE_HEADERS, "x-role": "summary"}
+
+# Back off before restarting a crashed periodic task so a persistent error doesn't spin
+_RESTART_DELAY_SECONDS = 5
+
+_STATE_URL = SERVER_URL + "/state"
+# Only the free text field needs quoting
+_THINK_FMT = SERVER_URL + "/think?player={}&thoughts={}"
+
 class MinimalTwitchBot(commands.AutoBot):
     def __init__(self, *, token_database: asqlite.Pool, subs: list[eventsub.SubscriptionPayload]):
         game_state.p1.name = "Olivia"
         game_state.p1.health = 1
         game_state.p2.name = "Athena"
         game_state.p2.health = 1
-        # Storage for P1 and P2 messages per user
-        self.p1_messages: Dict[str, str] = {"globalworming": "lightspeed jetpack, can cross the the event horizon twice"}
-        self.p2_messages: Dict[str, str] = {"globalworming": "targeted rockets travelling through the ether"}
+        # Storage for P1 and P2 messages per user, capped to the most recent MAX_PLAYER_MESSAGES users
+        self.p1_messages: OrderedDict[str, str] = OrderedDict({"globalworming": "lightspeed jetpack, can cross the the event horizon twice"})
+        self.p2_messages: OrderedDict[str, str] = OrderedDict({"globalworming": "targeted rockets travelling through the ether"})
         self.token_database = token_database
-        self.remaining = 0  # Countdown timer for next judgment
+        self._token_conn: asqlite.Connection | None = None  # pinned connection for token writes
+        self._token_conn_lock = asyncio.Lock()  # concurrent first writes must not each acquire one
+        self._round_deadline = 0.0  # Event loop time of the next judgment
+        # Summaries are fetched concurrently but must be spoken one after the other
+        self._tts_lock = asyncio.Lock()
+        # Set whenever player messages change, the flusher persists them in batches
+        self._messages_dirty = asyncio.Event()
+        # Set when there are new messages to summarize
+        self._messages_available = asyncio.Event()
+        self._messages_available.set()
+        # Judge payload scaffold, filled in before every judgment
+        self._sent_state: dict | None = None  # last game state the server accepted
+        self._payload = {"players": {"P1": {"name": ""}, "P2": {"name": ""}}, "p1_messages": [], "p2_messages": []}
         
         super().__init__(
             client_id=CLIENT_ID,
@@ -53,6 +84,10 @@ class MinimalTwitchBot(commands.AutoBot):
         # Start the periodic tasks
         self.judge_task = None
         self.summary_task = None
+        self.hide_task = None
+        self.flush_task = None
+        self._restart_handles: dict[str, asyncio.TimerHandle] = {}  # pending restarts of crashed tasks
+        self._session: aiohttp.ClientSession | None = None
 
     async def setup_hook(self) -> None:
         # Add our message handler component
@@ -60,9 +95,67 @@ class MinimalTwitchBot(commands.AutoBot):
         await self.add_component(GameStateMessageHandler(self))
         await self.add_component(SimpleCommands(self))
 
+        # One pooled session for the overlay server and cloud function, keeps connections and DNS lookups warm
+        connector = aiohttp.TCPConnector(limit=32, limit_per_host=8, ttl_dns_cache=300, use_dns_cache=True, enable_cleanup_closed=True)
+        self._session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=60, connect=10))
+
+        # Pick up messages from before a restart
+        p1_messages, p2_messages = await load_player_messages(self.token_database)
+        if p1_messages or p2_messages:
+            self.p1_messages = OrderedDict(p1_messages)
+            self.p2_messages = OrderedDict(p2_messages)
+            LOGGER.info(f"Restored {len(p1_messages)} P1 and {len(p2_messages)} P2 messages")
+
         # Start periodic tasks
-        self.judge_task = asyncio.create_task(self.periodic_jugdgement_post())
-        self.summary_task = asyncio.create_task(self.periodic_summary_post())
+        self.flush_task = self.start_periodic_task("flush_task", self.periodic_messages_flush)
+        self.judge_task = self.start_periodic_task("judge_task", self.periodic_jugdgement_post)
+        self.summary_task = self.start_periodic_task("summary_task", self.periodic_summary_post)
+
+    @property
+    def remaining(self) -> int:
+        """Countdown in seconds until the next judgment"""
+        return max(0, int(self._round_deadline - asyncio.get_running_loop().time()))
+
+    async def close(self, **options) -> None:
+        # Stop background work before the shared session goes away
+        for handle in self._restart_handles.values():
+            handle.cancel()
+        self._restart_handles.clear()
+        for task in (self.judge_task, self.summary_task, self.hide_task, self.flush_task):
+            if task:
+                task.cancel()
+        if self._session:
+            await self._session.close()
+        # Save whatever chat arrived since the last flush while the pool is still open
+        if self._messages_dirty.is_set():
+            await self._save_messages()
+        if self._token_conn:
+            await self.token_database.release(self._token_conn)
+            self._token_conn = None
+        await super().close(**options)
+
+    def start_periodic_task(self, name: str, coro_fn) -> asyncio.Task:
+        """Start a periodic task that logs and restarts itself if it dies"""
+        # Starting it explicitly supersedes a pending restart
+        pending = self._restart_handles.pop(name, None)
+        if pending:
+            pending.cancel()
+        task = asyncio.create_task(coro_fn())
+
+        def _restart(t: asyncio.Task) -> None:
+            if t.cancelled():
+                return
+            LOGGER.error(f"{name} stopped unexpectedly, restarting in {_RESTART_DELAY_SECONDS}s", exc_info=t.exception())
+            self._restart_handles[name] = asyncio.get_running_loop().call_later(_RESTART_DELAY_SECONDS, _start_again, t)
+
+        def _start_again(t: asyncio.Task) -> None:
+            self._restart_handles.pop(name, None)
+            # Skip if the task was replaced meanwhile, e.g. a new game started a fresh judge loop
+            if getattr(self, name) is t:
+                setattr(self, name, self.start_periodic_task(name, coro_fn))
+
+        task.add_done_callback(_restart)
+        return task
 
     async def event_oauth_authorized(self, payload: twitchio.authentication.UserTokenPayload) -> None:
         await self.add_token(payload.access_token, payload.refresh_token)
@@ -78,9 +171,20 @@ class MinimalTwitchBot(commands.AutoBot):
             LOGGER.warning("Failed to subscribe to: %r, for user: %s", resp.errors, payload.user_id)
 
     async def add_token(self, token: str, refresh: str) -> twitchio.authentication.ValidateTokenPayload:
-        resp = await super().add_token(token, refresh)
-        
-        # Store tokens in database
+        resp = await self._validate_token(token, refresh)
+        await self._persist_tokens([(resp.user_id, token, refresh)])
+        return resp
+
+    async def add_tokens(self, tokens: list[tuple[str, str]]) -> None:
+        """Validate stored (token, refresh) pairs concurrently and write them back in one statement"""
+        responses = await asyncio.gather(*(self._validate_token(token, refresh) for token, refresh in tokens))
+        await self._persist_tokens([(resp.user_id, token, refresh) for resp, (token, refresh) in zip(responses, tokens)])
+
+    async def _validate_token(self, token: str, refresh: str) -> twitchio.authentication.ValidateTokenPayload:
+        return await super().add_token(token, refresh)
+
+    async def _persist_tokens(self, rows: list[tuple[str, str, str]]) -> None:
+        """Store (user_id, token, refresh) rows in database"""
         query = """
         INSERT INTO tokens (user_id, token, refresh)
         VALUES (?, ?, ?)
@@ -90,11 +194,19 @@ class MinimalTwitchBot(commands.AutoBot):
             refresh = excluded.refresh;
         """
         
-        async with self.token_database.acquire() as connection:
-            await connection.execute(query, (resp.user_id, token, refresh))
+        connection = await self._token_connection()
+        await connection.executemany(query, rows)
         
-        LOGGER.debug("Added token to database for user: %s", resp.user_id)
-        return resp
+        LOGGER.debug("Added tokens to database for users: %s", [row[0] for row in rows])
+
+    async def _token_connection(self) -> asqlite.Connection:
+        """Connection reused for every token write instead of acquiring one from the pool each time"""
+        async with self._token_conn_lock:
+            if self._token_conn is None:
+                connection = await self.token_database.acquire()
+                await connection.execute("""PRAGMA synchronous=NORMAL""")
+                self._token_conn = connection
+        return self._token_conn
 
     async def event_ready(self) -> None:
         LOGGER.debug("Bot ready | Bot ID: %s", self.bot_id)
@@ -103,62 +215,64 @@ class MinimalTwitchBot(commands.AutoBot):
     async def periodic_jugdgement_post(self):
         """Post messages to cloud function"""
         while True:
-            await self._update_server_state()
-            await self._update_player_thinking(game_state.p1, "what next...")
-            await self._update_player_thinking(game_state.p2, "what next...")
-            await self._hide_summary()
+            if self.hide_task:
+                # let the previous summary finish showing before the next round,
+                # asyncio.wait so cancelling this loop doesn't cancel the hide too
+                await asyncio.wait([self.hide_task])
+                self.hide_task = None
+            # independent overlay updates, send them together
+            await asyncio.gather(
+                self._update_server_state(),
+                self._update_player_thinking(game_state.p1, "what next..."),
+                self._update_player_thinking(game_state.p2, "what next..."),
+                self._hide_summary(),
+                return_exceptions=True,
+            )
             
             # Start new round
             try:
-                async with aiohttp.ClientSession() as session:
-                    start_url = f"{SERVER_URL}/start_round?duration={POST_INTERVAL_SECONDS}"
-                    async with session.get(start_url) as response:
-                        if response.status == 200:
-                            LOGGER.info("Successfully started new round")
-                        else:
-                            LOGGER.error(f"Failed to start round: {response.status}")
+                start_url = f"{SERVER_URL}/start_round?duration={POST_INTERVAL_SECONDS}"
+                async with self._session.get(start_url) as response:
+                    if response.status == 200:
+                        LOGGER.info("Successfully started new round")
+                        await response.read()
+                    else:
+                        LOGGER.error(f"Failed to start round: {response.status} - {await response.text()}")
             except Exception as e:
                 LOGGER.error(f"Error starting round: {e}")
-            for remaining in range(POST_INTERVAL_SECONDS, 0, -1):
-                self.remaining = remaining
-                #LOGGER.info(f"Next judge in {remaining}s...")
-                await asyncio.sleep(1)
-            self.remaining = 0
+            self._round_deadline = asyncio.get_running_loop().time() + POST_INTERVAL_SECONDS
+            await asyncio.sleep(POST_INTERVAL_SECONDS)
             
             if not self.p1_messages and not self.p2_messages:
                 LOGGER.info("No messages to post")
                 continue
                 
-            payload = {
-                "players": { 
-                    "P1":{
-                        "name": game_state.p1.name,
-                    }, 
-                    "P2":{
-                        "name": game_state.p2.name,
-                    }
-                },
-                "p1_messages": list(self.p1_messages.values()),
-                "p2_messages": list(self.p2_messages.values()),
-            }
+            payload = self._payload
+            payload["players"]["P1"]["name"] = game_state.p1.name
+            payload["players"]["P2"]["name"] = game_state.p2.name
+            # identical messages from different users only need judging once
+            payload["p1_messages"] = list(dict.fromkeys(self.p1_messages.values()))
+            payload["p2_messages"] = list(dict.fromkeys(self.p2_messages.values()))
             
-            LOGGER.info("payload: %r", payload)
+            LOGGER.debug("payload: %r", payload)
             try:
                 response_text = None
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(
-                        JUDGE_CLOUD_FUNCTION_URL,
-                        json=payload,
-                        headers={"Content-Type": "application/json", "Authorization": f"Bearer {JUDGE_CLOUD_FUNCTION_TOKEN}", "x-role": "judge"}
-                    ) as response:
-                        response_text = await response.text()
-                        LOGGER.info(f"Cloud function response ({response.status}): {response_text}")
-
-                if response_text.lower().endswith("p1"):
+                async with self._session.post(
+                    JUDGE_CLOUD_FUNCTION_URL,
+                    json=payload,
+                    headers=_JUDGE_HEADERS
+                ) as response:
+                    raw = await response.read()
+                    response_text = raw.decode("utf-8", "replace")
+                    LOGGER.info(f"Cloud function response ({response.status}): {response_text}")
+
+                # only the verdict at the end matters, no need to lowercase the whole reasoning
+                verdict = raw[-32:].decode("utf-8", "ignore").strip().lower()
+                if verdict.endswith("p1"):
                     game_state.p2.take_damage(1)
-                elif response_text.lower().endswith("p2"):
+                elif verdict.endswith("p2"):
                     game_state.p1.take_damage(1)
-                elif response_text.lower().endswith("draw"):
+                elif verdict.endswith("draw"):
                     game_state.p1.take_damage(1)
                     game_state.p2.take_damage(1)
                 else:
@@ -167,20 +281,20 @@ class MinimalTwitchBot(commands.AutoBot):
 
 
                 # Call show endpoint with response summary
-                summary_text = response_text.replace("P1", game_state.p1.name)
-                summary_text = summary_text.replace("P2", game_state.p2.name)
-                if not summary_text.lower().endswith("draw"):
+                name_map = {"1": game_state.p1.name, "2": game_state.p2.name}
+                summary_text = _P_RE.sub(lambda m: name_map[m.group(1)], response_text.rstrip())
+                if not verdict.endswith("draw"):
                     summary_text += " wins!!!"
 
                 try:
                     show_url = f"{SERVER_URL}/show"
                     show_params = {"summary": summary_text}
-                    async with aiohttp.ClientSession() as show_session:
-                        async with show_session.get(show_url, params=show_params) as show_response:
-                            if show_response.status == 200:
-                                LOGGER.info("Successfully called show endpoint")
-                            else:
-                                LOGGER.warning(f"Show endpoint call failed: {show_response.status}")
+                    async with self._session.get(show_url, params=show_params) as show_response:
+                        if show_response.status == 200:
+                            LOGGER.info("Successfully called show endpoint")
+                            await show_response.read()
+                        else:
+                            LOGGER.warning(f"Show endpoint call failed: {show_response.status} - {await show_response.text()}")
                 except Exception as e:
                     LOGGER.error(f"Failed to call show endpoint: {e}")
 
@@ -188,20 +302,18 @@ class MinimalTwitchBot(commands.AutoBot):
                 await self._update_server_state()
                 
                 # wait for folks to read the text
-
+                hide_in = 2
                 if (SPEECH_ENABLED):
                     try:    
                         await self._tts(summary_text)
                     except Exception as e:
-                        await asyncio.sleep(min(60, len(summary_text) / 8))
+                        LOGGER.warning(f"TTS for summary failed: {e}")
+                        hide_in += READ_DELAY_SECONDS
                 else:
-                    await asyncio.sleep(min(60, len(summary_text) / 8))
+                    hide_in += min(60, len(summary_text) / 8)
 
-                await asyncio.sleep(2)
-                
-                await self._hide_summary()
-                # wait a bit before starting next one
-                await asyncio.sleep(2)
+                # hide in the background so the game over check doesn't wait on it
+                self.hide_task = asyncio.create_task(self._delayed_hide(hide_in))
 
                 if game_state.check_game_over():                    
                     await asyncio.sleep(15)
@@ -210,9 +322,14 @@ class MinimalTwitchBot(commands.AutoBot):
                     LOGGER.info("reset game_state")
                     self.p1_messages.clear()
                     self.p2_messages.clear()
+                    self._messages_dirty.set()
                     LOGGER.info("Messages cleared")
-                    await self._update_player_thinking(game_state.p1, "what next...")
-                    await self._update_player_thinking(game_state.p2, "what next...")
+                    await asyncio.gather(
+                        self._update_server_state(),
+                        self._update_player_thinking(game_state.p1, "what next..."),
+                        self._update_player_thinking(game_state.p2, "what next..."),
+                        return_exceptions=True,
+                    )
                     
                 
             except Exception as e:
@@ -223,38 +340,42 @@ class MinimalTwitchBot(commands.AutoBot):
         #    return
         """Process summary for a single player"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    JUDGE_CLOUD_FUNCTION_URL,
-                    json={"messages": list(messages.values())},
-                    headers={"Content-Type": "application/json", "Authorization": f"Bearer {JUDGE_CLOUD_FUNCTION_TOKEN}", "x-role": "summary"}
-                ) as response:
-                    if response.status == 200:
-                        #LOGGER.info(f"got {player} summary")
-                        response_text = await response.text()
-                        LOGGER.info(f"Summary response ({response.status}) {player}: {response_text}")             
-                        await self._update_player_thinking(player, response_text)
-                        if self.remaining > 10:
-                            text = f"{player.name} considers: {response_text}"
-                            try:
-                                await self._tts(text)
-                            except Exception as e:
-                                LOGGER.warning(f"get {player} summary failed: {response.status}")
-                    else:
-                        LOGGER.warning(f"get {player} summary failed: {response.status}")
+            async with self._session.post(
+                JUDGE_CLOUD_FUNCTION_URL,
+                json={"messages": list(dict.fromkeys(messages.values()))},
+                headers=_SUMMARY_HEADERS
+            ) as response:
+                if response.status == 200:
+                    #LOGGER.info(f"got {player} summary")
+                    response_text = await response.text()
+                    LOGGER.info(f"Summary response ({response.status}) {player}: {response_text}")             
+                    await self._update_player_thinking(player, response_text)
+                    if self.remaining > 10:
+                        text = f"{player.name} considers: {response_text}"
+                        try:
+                            await self._tts(text, min_remaining=10)
+                        except Exception as e:
+                            LOGGER.warning(f"get {player} summary failed: {response.status}")
+                else:
+                    LOGGER.warning(f"get {player} summary failed: {response.status}")
                 
         except Exception as e:
             LOGGER.error(f"Failed to post summary to cloud function: {e}")
 
-    async def _tts(self, text: str):
+    async def _tts(self, text: str, min_remaining: int | None = None):
         if not SPEECH_ENABLED:
             return
-        """Play text to speech"""
+        """Play text to speech, skipped if waiting for the speaker left min_remaining seconds or less"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"http://0.0.0.0:8001/tts?text={text}") as response:
+            # one utterance at a time, the endpoint returns once playback is done
+            async with self._tts_lock:
+                if min_remaining is not None and self.remaining <= min_remaining:
+                    LOGGER.info("Skipped TTS, too close to the judgment")
+                    return
+                async with self._session.get("http://0.0.0.0:8001/tts", params={"text": text}) as response:
                     if response.status == 200:
                         LOGGER.info("Successfully called TTS endpoint")
+                        await response.read()
                     else:
                         raise Exception(f"Failed to call TTS endpoint: {response.status} - {await response.text()}")
         except Exception as e:
@@ -262,77 +383,103 @@ class MinimalTwitchBot(commands.AutoBot):
 
     async def periodic_summary_post(self):
         while True:
+            await self._messages_available.wait()
+            self._messages_available.clear()
             if not self.p1_messages and not self.p2_messages:
-                await asyncio.sleep(1)
                 continue
-            p1_first = random.choice([True, False])
+            p1_first = bool(random.getrandbits(1))
             if game_state.p1.health > game_state.p2.health:
                 p1_first = False
             elif game_state.p2.health > game_state.p1.health:
                 p1_first = True
 
-            if p1_first:
-                if self.p1_messages:
-                    await self._process_player_summary(game_state.p1, self.p1_messages)
-                    await asyncio.sleep(10)            
-                if self.p2_messages:
-                    await self._process_player_summary(game_state.p2, self.p2_messages)
-            else:
-                if self.p2_messages:
-                    await self._process_player_summary(game_state.p2, self.p2_messages)
-                    await asyncio.sleep(10)
-                if self.p1_messages:
-                    await self._process_player_summary(game_state.p1, self.p1_messages)
+            players = [(game_state.p1, self.p1_messages), (game_state.p2, self.p2_messages)]
+            if not p1_first:
+                players.reverse()
+            # summaries are independent, request them together; the first one still gets sent first
+            tasks = [self._process_player_summary(player, messages) for player, messages in players if messages]
+            await asyncio.gather(*tasks, return_exceptions=True)
             await asyncio.sleep(10)
             
     async def _update_server_state(self):
-        """Update server state via REST call"""
+        """Update server state via REST call, skipped if nothing changed since the last update"""
+        state = game_state.to_dict()
+        if state == self._sent_state:
+            return
         try:
-            state_url = f"{SERVER_URL}/state"
-            params = {
-                "p1Name": game_state.p1.name,
-                "p2Name": game_state.p2.name,
-                "p1Health": game_state.p1.health,
-                "p2Health": game_state.p2.health,
-                "p1Wins": game_state.p1.wins,
-                "p2Wins": game_state.p2.wins
-            }
-            async with aiohttp.ClientSession() as state_session:
-                async with state_session.get(state_url, params=params) as state_response:
-                    if state_response.status == 200:
-                        LOGGER.info("Successfully updated server state")
-                    else:
-                        LOGGER.warning(f"Server state update failed: {state_response.status}")
+            async with self._session.post(_STATE_URL, json=state) as state_response:
+                if state_response.status == 200:
+                    LOGGER.info("Successfully updated server state")
+                    self._sent_state = state
+                    await state_response.read()
+                else:
+                    LOGGER.warning(f"Server state update failed: {state_response.status} - {await state_response.text()}")
         except Exception as e:
             LOGGER.error(f"Failed to update server state: {e}")
 
     async def _update_player_thinking(self, player: Fighter, thoughts: str):
         """Update player thinking via REST call"""
         try:
-            think_url = f"{SERVER_URL}/think"
-            think_params = {"player": "P1" if player == game_state.p1 else "P2", "thoughts": thoughts}
-            async with aiohttp.ClientSession() as think_session:
-                async with think_session.get(think_url, params=think_params) as think_response:
-                    if think_response.status == 200:
-                        LOGGER.info(f"Successfully updated {player.name} thinking")
-                    else:
-                        LOGGER.warning(f"{player.name} think update failed: {think_response.status}")
+            think_url = _THINK_FMT.format("P1" if player is game_state.p1 else "P2", quote_plus(thoughts))
+            async with self._session.get(think_url) as think_response:
+                if think_response.status == 200:
+                    LOGGER.info(f"Successfully updated {player.name} thinking")
+                    await think_response.read()
+                else:
+                    LOGGER.warning(f"{player.name} think update failed: {think_response.status} - {await think_response.text()}")
         except Exception as e:
             LOGGER.error(f"Failed to update {player.name} thinking: {e}")
 
+    async def _delayed_hide(self, delay: float):
+        """Hide the summary modal after delay seconds"""
+        await asyncio.sleep(delay)
+        await self._hide_summary()
+        # wait a bit before starting next one
+        await asyncio.sleep(2)
+
+    def store_message(self, messages: OrderedDict[str, str], username: str, content: str) -> None:
+        """Store latest message for the user, dropping the least recent users over the cap"""
+        messages[username] = content
+        messages.move_to_end(username)
+        while len(messages) > MAX_PLAYER_MESSAGES:
+            messages.popitem(last=False)
+        self._messages_dirty.set()
+        self._messages_available.set()
+
+    async def periodic_messages_flush(self):
+        """Persist player messages to the database, coalescing bursts of chat into one write"""
+        while True:
+            await self._messages_dirty.wait()
+            await asyncio.sleep(5)
+            await self._save_messages()
+
+    async def _save_messages(self) -> None:
+        """Write the current player messages to the database"""
+        self._messages_dirty.clear()
+        rows = [("P1", username, content) for username, content in self.p1_messages.items()]
+        rows += [("P2", username, content) for username, content in self.p2_messages.items()]
+        try:
+            await save_player_messages(self.token_database, rows)
+            LOGGER.debug("Persisted %d player messages", len(rows))
+        except asyncio.CancelledError:
+            # interrupted mid-write, the final save in close() has to redo it
+            self._messages_dirty.set()
+            raise
+        except Exception as e:
+            LOGGER.error(f"Failed to persist player messages: {e}")
+
     async def _hide_summary(self):
         try:
             hide_url = f"{SERVER_URL}/hide"
-            async with aiohttp.ClientSession() as hide_session:
-                async with hide_session.get(hide_url) as hide_response:
-                    if hide_response.status == 200:
-                        LOGGER.info("Successfully hidden summary modal")
-                    else:
-                        LOGGER.warning(f"Summary modal hide failed: {hide_response.status}")
+            async with self._session.get(hide_url) as hide_response:
+                if hide_response.status == 200:
+                    LOGGER.info("Successfully hidden summary modal")
+                    await hide_response.read()
+                else:
+                    LOGGER.warning(f"Summary modal hide failed: {hide_response.status} - {await hide_response.text()}")
         except Exception as e:
             LOGGER.error(f"Failed to hide summary modal: {e}")
 
-import re
 from game_state import game_state
 
 class SimpleCommands(commands.Component):
@@ -340,6 +487,15 @@ class SimpleCommands(commands.Component):
     def __init__(self, bot: MinimalTwitchBot) -> None:
         self.bot = bot
         self.speak_enabled = False
+        self._play_lock = asyncio.Lock()
+        # Kept for the component's lifetime so !speak reuses the connection to the TTS server
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=10, ttl_dns_cache=300, keepalive_timeout=60),
+            timeout=aiohttp.ClientTimeout(total=30),
+        )
+
+    async def component_teardown(self) -> None:
+        await self._session.close()
     
     @commands.command(name="")
     async def help(self, ctx: commands.Context):
@@ -354,27 +510,29 @@ class SimpleCommands(commands.Component):
 
     @commands.command()
     async def p1(self, ctx: commands.Context, *, content: str = ""):
-        if content.strip() == "":
+        """Store P1 message for the user"""
+        p1_content = content.strip()
+        if not p1_content:
             await ctx.send("usage: !p1 <message> – like !p1 has ninja skills")
             return
 
-        """Store P1 message for the user"""
         username = ctx.author.name
-        p1_content = content.strip()[:MESSAGE_MAX_LENGTH]
-        self.bot.p1_messages[username] = p1_content
-        LOGGER.info(f"Stored P1 from {username}: {p1_content}")
+        p1_content = p1_content[:MESSAGE_MAX_LENGTH]
+        self.bot.store_message(self.bot.p1_messages, username, p1_content)
+        LOGGER.debug("Stored P1 from %s: %s", username, p1_content)
     
     @commands.command()
     async def p2(self, ctx: commands.Context, *, content: str = ""):
-        if content.strip() == "":
+        """Store P2 message for the user"""
+        p2_content = content.strip()
+        if not p2_content:
             await ctx.send("usage: !p2 <message> – like !p2 has ninja skills")
             return
 
-        """Store P2 message for the user"""
         username = ctx.author.name
-        p2_content = content.strip()[:MESSAGE_MAX_LENGTH]
-        self.bot.p2_messages[username] = p2_content
-        LOGGER.info(f"Stored P2 from {username}: {p2_content}")
+        p2_content = p2_content[:MESSAGE_MAX_LENGTH]
+        self.bot.store_message(self.bot.p2_messages, username, p2_content)
+        LOGGER.debug("Stored P2 from %s: %s", username, p2_content)
 
     @commands.command()
     async def speak(self, ctx: commands.Context, *, content: str = "what do you want?"):
@@ -387,17 +545,19 @@ class SimpleCommands(commands.Component):
         self.speak_enabled = True
         """Play text to speech"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"http://t431s:8002/tts?text={quote(content)}&speakerJson=summary.json") as response:
-                    if response.status == 200:
-                        LOGGER.info("Successfully called TTS endpoint")
-                        wav_bytes = await response.read()
-                        play(wav_bytes)
-                    else:
-                        response_json = await response.json()
-                        text = response_json.get("detail", "Error")
-                        await ctx.send(f"TTS: {response.status} {text}")
-                        raise Exception(f"Failed to call TTS endpoint: {response.status} - {text}")
+            async with self._session.get("http://t431s:8002/tts", params={"text": content, "speakerJson": "summary.json"}) as response:
+                if response.status == 200:
+                    LOGGER.info("Successfully called TTS endpoint")
+                    wav_bytes = await response.read()
+                    # playback blocks until the clip ends, keep the bot responsive meanwhile
+                    # but play one !speak clip at a time
+                    async with self._play_lock:
+                        await asyncio.to_thread(play, wav_bytes)
+                else:
+                    response_json = await response.json()
+                    text = response_json.get("detail", "Error")
+                    await ctx.send(f"TTS: {response.status} {text}")
+                    raise Exception(f"Failed to call TTS endpoint: {response.status} - {text}")
         except Exception as e:
             raise e
 
@@ -412,39 +572,57 @@ class GameStateMessageHandler(commands.Component):
     @commands.Component.listener()
     async def event_message(self, payload: twitchio.ChatMessage) -> None:
         # Log all messages
-        #LOGGER.info(f"[{payload.broadcaster.name}] - {payload.chatter.name}: {payload.text}")
+        if LOGGER.isEnabledFor(logging.DEBUG):
+            LOGGER.debug("[%s] - %s: %s", payload.broadcaster.name, payload.chatter.name, payload.text)
         
-        content = payload.text.strip()
-        content = content.strip()[:MESSAGE_MAX_LENGTH]
         username = payload.chatter.name
-        if username == "globalworming":
-            LOGGER.info(f"{username}: {content}")
-            match = re.match(r"^game (.*) vs (.*)$", content, re.IGNORECASE)
-            if match:
-                p1, p2 = match.group(1).strip(), match.group(2).strip()
-                game_state.set_players(p1, p2)
-                LOGGER.info(f"Game state set: {p1} vs {p2}")
-                self.bot.p1_messages.clear()
-                self.bot.p2_messages.clear()
-                LOGGER.info(f"Messages cleared")
-                if hasattr(self.bot, "judge_task") and self.bot.judge_task:
-                    self.bot.judge_task.cancel()
-                self.bot.judge_task = asyncio.create_task(self.bot.periodic_jugdgement_post())
+        if username != "globalworming":
+            return
+
+        content = payload.text.strip()[:MESSAGE_MAX_LENGTH]
+        LOGGER.debug("%s: %s", username, content)
+        match = _GAME_RE.match(content)
+        if match:
+            p1, p2 = match.group(1).strip(), match.group(2).strip()
+            game_state.set_players(p1, p2)
+            LOGGER.info(f"Game state set: {p1} vs {p2}")
+            self.bot.p1_messages.clear()
+            self.bot.p2_messages.clear()
+            self.bot._messages_dirty.set()
+            LOGGER.info(f"Messages cleared")
+            task = self.bot.judge_task
+            if task and not task.done():
+                task.cancel()
+                # let the old loop unwind so it can't race the new one
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+            self.bot.judge_task = self.bot.start_periodic_task("judge_task", self.bot.periodic_jugdgement_post)
 
 
 def main() -> None:
-    twitchio.utils.setup_logging(level=logging.INFO)
+    twitchio.utils.setup_logging(level=logging.WARNING)
     
     async def runner() -> None:
+        # Most tasks finish their first step without blocking, run them eagerly (Python 3.12+)
+        if hasattr(asyncio, "eager_task_factory"):
+            asyncio.get_running_loop().set_task_factory(asyncio.eager_task_factory)
+
         async with asqlite.create_pool("tokens.db") as tdb:
             tokens, subs = await setup_database(tdb)
             
             async with MinimalTwitchBot(token_database=tdb, subs=subs) as bot:
-                for pair in tokens:
-                    await bot.add_token(*pair)
+                await bot.add_tokens(tokens)
                 
                 await bot.start(load_tokens=False)
     
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        LOGGER.warning("uvloop not installed, using default asyncio event loop")
+
     try:
         asyncio.run(runner())
     except KeyboardInterrupt:
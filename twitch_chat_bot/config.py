@@ -19,5 +19,8 @@ SERVER_URL = os.getenv('SERVER_URL', 'http://localhost:8000')
 # Bot Settings
 MESSAGE_MAX_LENGTH = int(os.getenv('MESSAGE_MAX_LENGTH', '500'))
 POST_INTERVAL_SECONDS = int(os.getenv('POST_INTERVAL_SECONDS', '60'))
+MAX_PLAYER_MESSAGES = int(os.getenv('MAX_PLAYER_MESSAGES', '50'))
+# How long the summary stays up when TTS fails
+READ_DELAY_SECONDS = float(os.getenv('READ_DELAY_SECONDS', '5'))
 
 SPEECH_ENABLED=os.getenv('SPEECH_ENABLED', "false").lower() in ("true", "1", "t", "yes", "on")
\ No newline at end of file
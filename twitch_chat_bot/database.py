@@ -9,16 +9,40 @@ if TYPE_CHECKING:
 async def setup_database(db: asqlite.Pool) -> tuple[list[tuple[str, str]], list[eventsub.SubscriptionPayload]]:
     """Setup token database and return existing tokens/subscriptions"""
     query = """CREATE TABLE IF NOT EXISTS tokens(user_id TEXT PRIMARY KEY, token TEXT NOT NULL, refresh TEXT NOT NULL)"""
+    messages_query = """CREATE TABLE IF NOT EXISTS player_messages(player TEXT NOT NULL, user_name TEXT NOT NULL, content TEXT NOT NULL, PRIMARY KEY(player, user_name))"""
     
     async with db.acquire() as connection:
         await connection.execute(query)
-        rows: list[sqlite3.Row] = await connection.fetchall("""SELECT * from tokens""")
+        await connection.execute(messages_query)
+        # Explicit column order so rows can be unpacked without name lookups
+        rows: list[sqlite3.Row] = await connection.fetchall("""SELECT user_id, token, refresh from tokens""")
         
         tokens = []
         subs = []
         
-        for row in rows:
-            tokens.append((row["token"], row["refresh"]))
-            subs.extend([eventsub.ChatMessageSubscription(broadcaster_user_id=row["user_id"], user_id=BOT_ID)])
+        for user_id, token, refresh in rows:
+            tokens.append((token, refresh))
+            subs.append(eventsub.ChatMessageSubscription(broadcaster_user_id=user_id, user_id=BOT_ID))
     
     return tokens, subs
+
+
+async def load_player_messages(db: asqlite.Pool) -> tuple[dict[str, str], dict[str, str]]:
+    """Return stored P1 and P2 messages per user, in the order they were saved"""
+    p1_messages = {}
+    p2_messages = {}
+    async with db.acquire() as connection:
+        rows = await connection.fetchall("""SELECT player, user_name, content from player_messages ORDER BY rowid""")
+
+    for player, user_name, content in rows:
+        (p1_messages if player == "P1" else p2_messages)[user_name] = content
+
+    return p1_messages, p2_messages
+
+
+async def save_player_messages(db: asqlite.Pool, rows: list[tuple[str, str, str]]) -> None:
+    """Replace stored player messages with (player, user_name, content) rows"""
+    async with db.acquire() as connection:
+        async with connection.transaction():
+            await connection.execute("""DELETE FROM player_messages""")
+            await connection.executemany("""INSERT INTO player_messages (player, user_name, content) VALUES (?, ?, ?)""", rows)
@@ -59,11 +59,24 @@ class GameState:
     """Manages the overall game state"""
     p1: Fighter = field(default_factory=Fighter)
     p2: Fighter = field(default_factory=Fighter)
+    current_round: int = 0
+    # Lowercased name -> Fighter, refreshed by set_players
+    _by_name: dict = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._index_players()
+
+    def _index_players(self) -> None:
+        """Rebuild the name lookup used by get_player_by_name"""
+        # p1 last so it wins if both share a name, like the old p1-first comparison
+        self._by_name = {self.p2.name.lower(): self.p2, self.p1.name.lower(): self.p1}
     
     def set_players(self, p1_name: str, p2_name: str) -> None:
         """Set player names and initialize game"""
         self.p1.name = p1_name
         self.p2.name = p2_name
+        self._index_players()
+        self.current_round = 0
         self.reset_game()
         self.reset_wins()
         LOGGER.info(f"Set players: {p1_name} vs {p2_name}")
@@ -78,7 +91,8 @@ class GameState:
         """Reset the game state"""
         self.p1.reset_health()
         self.p2.reset_health()
-        LOGGER.info(f"Game reset")
+        self.current_round += 1
+        LOGGER.info(f"Game reset, round {self.current_round}")
     
     def end_game(self, winner: Optional[Fighter] = None) -> None:
         """End the current game"""
@@ -105,11 +119,13 @@ class GameState:
     
     def get_player_by_name(self, name: str) -> Optional[Fighter]:
         """Get player by name"""
-        if self.p1.name.lower() == name.lower():
-            return self.p1
-        elif self.p2.name.lower() == name.lower():
-            return self.p2
-        return None
+        key = name.lower()
+        player = self._by_name.get(key)
+        # names can be assigned directly on the fighters, rebuild the index if it went stale
+        if player is None or player.name.lower() != key:
+            self._index_players()
+            player = self._by_name.get(key)
+        return player
     
     def to_dict(self) -> dict:
         """Convert game state to dictionary"""
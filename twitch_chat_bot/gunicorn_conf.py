@@ -0,0 +1,14 @@
+"""Gunicorn settings for the FastAPI servers
+
+gunicorn -c gunicorn_conf.py main:app
+GUNICORN_BIND=0.0.0.0:8001 gunicorn -c gunicorn_single_conf.py speech:app
+GUNICORN_BIND=0.0.0.0:8002 gunicorn -c gunicorn_single_conf.py tts_server:app
+"""
+import os
+
+# UvicornWorker runs each worker on uvloop + httptools when installed
+worker_class = "uvicorn.workers.UvicornWorker"
+# Without Redis, SSE events only reach clients of the worker that received them, so stay at one
+_default_workers = 2 * (os.cpu_count() or 1) + 1 if os.getenv("REDIS_URL") else 1
+workers = int(os.getenv("WEB_CONCURRENCY", _default_workers))
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
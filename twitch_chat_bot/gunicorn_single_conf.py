@@ -0,0 +1,8 @@
+"""Gunicorn settings for servers that must run in a single worker
+
+tts_server loads its TTS model per worker and speech serializes playback per process,
+so both stay at one worker regardless of WEB_CONCURRENCY.
+"""
+from gunicorn_conf import worker_class, bind
+
+workers = 1
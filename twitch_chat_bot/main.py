@@ -1,17 +1,90 @@
 import asyncio
-import json
+import itertools
+import logging
+import os
 import random
+import time
+import orjson
 from typing import Dict, Any
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
+import redis.asyncio as redis
 from sse_starlette.sse import EventSourceResponse
 
+LOGGER = logging.getLogger(__name__)
+
 # Initialize FastAPI app
-app = FastAPI(title="Twitch Chat Bot SSE Server")
+app = FastAPI(title="Twitch Chat Bot SSE Server", default_response_class=ORJSONResponse)
+
+# Redis pub/sub shares events between gunicorn workers, without REDIS_URL events stay in this process
+REDIS_URL = os.getenv("REDIS_URL")
+EVENTS_CHANNEL = "events"
+RELAY_RETRY_DELAY = 5
+
+# One queue per connected SSE client in this worker
+subscribers: set[asyncio.Queue] = set()
+# Max messages sent per wakeup of an SSE client
+SSE_BATCH_SIZE = 64
+# SSE event ids, unique per worker
+_event_ids = itertools.count(1)
+
+# Per client backlog, a stalled client loses its oldest messages beyond this
+QUEUE_MAX_SIZE = 1024
+_last_drop_warning = 0.0
+# Latest state event, replayed to clients that connect after it was sent
+_last_state: Dict[str, Any] | None = None
+
+def fan_out(message: Dict[str, Any]) -> None:
+    """Hand a message to every SSE client connected to this worker"""
+    global _last_drop_warning, _last_state
+    if message.get("event_type") == "state":
+        _last_state = message
+    for queue in subscribers:
+        if queue.full():
+            queue.get_nowait()
+            now = time.monotonic()
+            if now - _last_drop_warning >= 1.0:
+                _last_drop_warning = now
+                LOGGER.warning("SSE client queue full, dropping oldest messages")
+        queue.put_nowait(message)
 
-# Message broker using asyncio.Queue
-message_queue: asyncio.Queue = asyncio.Queue()
+async def emit(event_type: str, data: Dict[str, Any]) -> None:
+    """Publish an SSE event, stamping its data with the current time"""
+    await publish({"event_type": event_type, "data": {"timestamp": time.monotonic(), **data}})
+
+async def publish(message: Dict[str, Any]) -> None:
+    """Send a message to the SSE clients of all workers"""
+    if app.state.redis is None:
+        fan_out(message)
+    else:
+        await app.state.redis.publish(EVENTS_CHANNEL, orjson.dumps(message))
+
+def drop_stale_states(batch: list[Dict[str, Any]]) -> list[Dict[str, Any]]:
+    """State events are full snapshots, only the newest one in a batch needs sending"""
+    states = [i for i, message in enumerate(batch) if message.get("event_type") == "state"]
+    if len(states) < 2:
+        return batch
+    return [message for i, message in enumerate(batch) if message.get("event_type") != "state" or i == states[-1]]
+
+async def relay_events() -> None:
+    """Forward messages published by any worker to this worker's SSE clients,
+    resubscribing after a backoff if the Redis connection drops"""
+    while True:
+        pubsub = app.state.redis.pubsub()
+        try:
+            await pubsub.subscribe(EVENTS_CHANNEL)
+            async for raw in pubsub.listen():
+                if raw["type"] == "message":
+                    fan_out(orjson.loads(raw["data"]))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            LOGGER.error(f"Event relay failed, resubscribing in {RELAY_RETRY_DELAY}s: {e}")
+        finally:
+            await pubsub.aclose()
+        await asyncio.sleep(RELAY_RETRY_DELAY)
 
 # CORS Configuration
 app.add_middleware(
@@ -27,6 +100,16 @@ class FighterUpdate(BaseModel):
     fighter: str
     description: str
 
+class FighterState(BaseModel):
+    name: str
+    health: int
+    wins: int = 0
+
+class GameStateUpdate(BaseModel):
+    p1: FighterState
+    p2: FighterState
+    current_round: int = 0
+
 class TestEvent(BaseModel):
     event_type: str
     data: Dict[str, Any]
@@ -44,30 +127,43 @@ async def stream_events(request: Request):
     Example: localhost:8000/events
     """
     async def event_generator():
-        while True:
-            # Check if client is still connected
-            if await request.is_disconnected():
-                break
-            
-            try:
-                # Wait for a message in the queue with timeout
-                message = await asyncio.wait_for(message_queue.get(), timeout=1.0)
-                
-                # Format message for SSE
-                event_data = {
-                    "id": str(random.randint(100000, 999999)),
-                    "event": message.get("event_type", "update"),
-                    "data": json.dumps(message.get("data", {}))
-                }
-                
-                yield event_data
+        queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_MAX_SIZE)
+        # Late joiners, e.g. a reloaded overlay, start from the current state
+        if _last_state is not None:
+            queue.put_nowait(_last_state)
+        subscribers.add(queue)
+        try:
+            while True:
+                # Check if client is still connected
+                if await request.is_disconnected():
+                    break
                 
-            except asyncio.TimeoutError:
-                # Send keepalive ping every second
-                yield {
-                    "event": "ping",
-                    "data": json.dumps({"timestamp": asyncio.get_event_loop().time()})
-                }
+                try:
+                    # Wait for a message in the queue with timeout
+                    message = await asyncio.wait_for(queue.get(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    # Send keepalive ping every second
+                    yield {"event": "ping", "data": f'{{"timestamp":{time.monotonic()}}}'}
+                    continue
+
+                # Send whatever else is already waiting in one go, capped to keep latency bounded
+                batch = [message]
+                for _ in range(SSE_BATCH_SIZE - 1):
+                    try:
+                        batch.append(queue.get_nowait())
+                    except asyncio.QueueEmpty:
+                        break
+
+                for message in drop_stale_states(batch):
+                    # Format message for SSE
+                    event_type = message.get("event_type", "update")
+                    yield {
+                        "id": str(next(_event_ids)),
+                        "event": event_type,
+                        "data": orjson.dumps(message.get("data", {})).decode()
+                    }
+        finally:
+            subscribers.discard(queue)
     
     return EventSourceResponse(event_generator())
 
@@ -77,15 +173,7 @@ async def start_round(duration: int = 50):
     start the on screen countdown
     localhost:8000/start_round?duration=30
     """
-    message = {
-        "event_type": "start_round",
-        "data": {
-            "timestamp": asyncio.get_event_loop().time(),
-            "duration": duration
-        }
-    }
-    
-    await message_queue.put(message)
+    await emit("start_round", {"duration": duration})
     
     return {"status": "success", "message": "Round started"}
 
@@ -97,15 +185,7 @@ async def think(player: str= "P1",thoughts: str = "what next"):
     localhost:8000/think?player=P1&thoughts=Planning%20my%20next%20move
     localhost:8000/think?player=P2&thoughts=Analyzing%20opponent%20strategy
     """
-    message = {
-        "event_type": "think",
-        "data": {
-            "timestamp": asyncio.get_event_loop().time(),
-            player: thoughts,
-        }
-    }
-    
-    await message_queue.put(message)
+    await emit("think", {player: thoughts})
     
     return {"status": "success", "message": "updated thinking"}
 
@@ -116,15 +196,7 @@ async def show(summary: str = "FIXME"):
     Examples:
     localhost:8000/show?summary=Round%201%20Complete%20-%20Fighter1%20Wins!
     """
-    message = {
-        "event_type": "show",
-        "data": {
-            "timestamp": asyncio.get_event_loop().time(),
-            "summary": summary
-        }
-    }
-    
-    await message_queue.put(message)
+    await emit("show", {"summary": summary})
     
     return {"status": "success", "message": "show result"}
 
@@ -134,14 +206,7 @@ async def hide():
     Hide result or summary from screen
     Example: localhost:8000/hide
     """
-    message = {
-        "event_type": "hide",
-        "data": {
-            "timestamp": asyncio.get_event_loop().time(),
-        }
-    }
-    
-    await message_queue.put(message)
+    await emit("hide", {})
     
     return {"status": "success", "message": "hide result"}
 
@@ -152,19 +217,36 @@ async def state(p1Name: str = "P1", p2Name: str = "P2", p1Health: int = 3, p2Hea
     localhost:8000/state?p1Name=Fighter1&p2Name=Fighter2&p1Health=2&p2Health=3&p1Wins=1&p2Wins=0
     localhost:8000/state?p1Name=Zangief&p2Name=Ryu&p1Health=1&p2Health=2&p1Wins=2&p2Wins=1
     """
-    message = {
-        "event_type": "state",
-        "data": {
-            "timestamp": asyncio.get_event_loop().time(),
+    await emit(
+        "state",
+        {
             "p1Name": p1Name,
             "p2Name": p2Name,
             "p1Health": p1Health,
             "p2Health": p2Health,
             "p1Wins": p1Wins,
-            "p2Wins": p2Wins
-        }
-    }
-    await message_queue.put(message)
+            "p2Wins": p2Wins,
+        },
+    )
+    return {"status": "success", "message": "state updated"}
+
+@app.post("/state")
+async def post_state(game: GameStateUpdate):
+    """
+    Update game state information from a serialized GameState
+    """
+    await emit(
+        "state",
+        {
+            "p1Name": game.p1.name,
+            "p2Name": game.p2.name,
+            "p1Health": game.p1.health,
+            "p2Health": game.p2.health,
+            "p1Wins": game.p1.wins,
+            "p2Wins": game.p2.wins,
+            "round": game.current_round,
+        },
+    )
     return {"status": "success", "message": "state updated"}
 
 @app.post("/update_fighter")
@@ -172,16 +254,7 @@ async def update_fighter(fighter_data: FighterUpdate):
     """
     update fighter information
     """
-    message = {
-        "event_type": "fighter_update",
-        "data": {
-            "fighter": fighter_data.fighter,
-            "description": fighter_data.description,
-            "timestamp": asyncio.get_event_loop().time()
-        }
-    }
-    
-    await message_queue.put(message)
+    await emit("fighter_update", {"fighter": fighter_data.fighter, "description": fighter_data.description})
     
     return {"status": "success", "message": "Fighter updated and events queued"}
 
@@ -197,27 +270,22 @@ async def send_random_test_event():
     """
     Helper function to send a random SSE event for testing.
     """
-    test_events = [
+    await emit(
+        "fighter_update",
         {
-            "event_type": "fighter_update",
-            "data": {
-                "fighter": f"fighter{random.randint(1, 2)}",
-                "description": f"Test update from server: {random.randint(1, 1000)}",
-                "timestamp": asyncio.get_event_loop().time()
-            }
+            "fighter": f"fighter{random.randint(1, 2)}",
+            "description": f"Test update from server: {random.randint(1, 1000)}",
         },
-    ]
-    
-    random_event = random.choice(test_events)
-    await message_queue.put(random_event)
+    )
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
-        "queue_size": message_queue.qsize(),
-        "timestamp": asyncio.get_event_loop().time()
+        "clients": len(subscribers),
+        "queue_size": sum(queue.qsize() for queue in subscribers),
+        "timestamp": time.monotonic()
     }
 
 # Background task to send periodic test events (optional)
@@ -226,9 +294,19 @@ async def startup_event():
     """
     Optional: Start background task for periodic events
     """
+    app.state.redis = redis.Redis.from_url(REDIS_URL) if REDIS_URL else None
+    if app.state.redis is not None:
+        app.state.relay_task = asyncio.create_task(relay_events())
     print("SSE Server started successfully!")
     print("Available endpoints:")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    if app.state.redis is not None:
+        app.state.relay_task.cancel()
+        await app.state.redis.aclose()
+
 if __name__ == "__main__":
     import uvicorn
+    # uvicorn[standard] picks uvloop and httptools on its own when they're available
     uvicorn.run(app, host="0.0.0.0", port=8000, log_level="info")
@@ -1,3 +1,4 @@
+import asyncio
 import os
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
@@ -22,6 +23,9 @@ elevenlabs = ElevenLabs(
     api_key=os.getenv("ELEVENLABS_API_KEY"),
 )
 
+# Serializes audio playback on this machine
+playback_lock = asyncio.Lock()
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -39,8 +43,10 @@ async def text_to_speech(text: str):
             output_format="mp3_44100_128",
         )
         
-        # Play the audio
-        play(audio)
+        # Play the audio, in a thread since playback blocks until the clip ends,
+        # one clip at a time so concurrent requests don't play over each other
+        async with playback_lock:
+            await asyncio.to_thread(play, audio)
         
         return {
             "message": "Audio generated and played successfully",
@@ -52,4 +58,5 @@ async def text_to_speech(text: str):
 
 if __name__ == "__main__":
     import uvicorn
+    # uvicorn[standard] picks uvloop and httptools on its own when they're available
     uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
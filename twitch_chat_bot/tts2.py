@@ -8,7 +8,8 @@ interface = outetts.Interface(
             model=outetts.Models.VERSION_1_0_SIZE_1B,
             # For llama.cpp backend
             backend=outetts.Backend.LLAMACPP,
-            quantization=outetts.LlamaCppQuantization.FP16
+            # Q4_K_M is much faster on CPU than FP16, try Q5_K_M if sibilants sound off
+            quantization=outetts.LlamaCppQuantization.Q4_K_M
             # For transformers backend
             # backend=outetts.Backend.HF,
         )
@@ -32,11 +33,13 @@ output = interface.generate(
     )
 )
 
-output.save("output.wav")
+if output.audio is None:
+    raise RuntimeError("TTS generation returned no audio")
 
-data, samplerate = sf.read("output.wav")
+# encode the generated samples straight to WAV in memory, no round trip through output.wav
+# 1.0 models decode to a (1, 1, N) tensor, flatten it to mono samples
 with io.BytesIO() as buf:
-    sf.write(buf, data, samplerate, format='WAV')
+    sf.write(buf, output.audio.detach().cpu().numpy().reshape(-1), output.sr, format='WAV')
     wav_bytes = buf.getvalue()
 
 play(wav_bytes)
@@ -2,11 +2,12 @@ import asyncio
 import hashlib
 import os
 import io
+from functools import lru_cache
 import soundfile as sf
 from pathlib import Path
 from typing import Dict, Optional
 from fastapi import FastAPI, Query, HTTPException
-from fastapi.responses import Response
+from fastapi.responses import FileResponse
 import outetts
 
 # Initialize FastAPI app
@@ -15,61 +16,71 @@ app = FastAPI(title="TTS Server")
 # Directory to store generated WAV files
 WAV_DIR = Path("tts_cache")
 WAV_DIR.mkdir(exist_ok=True)
+# Files being written, moved into WAV_DIR once complete so a half-written file is never served
+PARTIAL_DIR = WAV_DIR / "partial"
+PARTIAL_DIR.mkdir(exist_ok=True)
 
 # Global TTS interface
 interface = None
-speaker = None
 
-# Track of ongoing generations to prevent duplicates
+# Track of ongoing generations to prevent duplicates, keyed by output filename (speaker + text)
 generating: Dict[str, asyncio.Event] = {}
 
+# The llama.cpp model can only run one generation at a time
+generation_lock = asyncio.Semaphore(1)
+
 def init_tts():
-    """Initialize the TTS interface and speaker"""
-    global interface, speaker
+    """Initialize the TTS interface"""
+    global interface
     
     interface = outetts.Interface(
         config=outetts.ModelConfig.auto_config(
             model=outetts.Models.VERSION_1_0_SIZE_1B,
             backend=outetts.Backend.LLAMACPP,
-            quantization=outetts.LlamaCppQuantization.FP16
+            # Q4_K_M is much faster on CPU than FP16, try Q5_K_M if sibilants sound off
+            quantization=outetts.LlamaCppQuantization.Q4_K_M
         )
     )
 
 def text_to_filename(speakerJson: str, text: str) -> str:
     """Convert text to a safe filename using hash"""
-    # Create a hash of the text for consistent filename
-    text_hash = hashlib.md5(text.encode()).hexdigest()
+    # Hash speaker and text so different voices don't share a cached file
+    text_hash = hashlib.blake2b(f"{speakerJson}\0{text}".encode("utf-8"), digest_size=16).hexdigest()
     return f"{text_hash}.wav"
 
-async def generate_tts_async(text: str, filename: str, speakerJson: str = "speek.json") -> None:
-
-        
-    # Load speaker configuration
-    speaker = interface.load_speaker(speakerJson)
+@lru_cache(maxsize=8)
+def _load_speaker(speakerJson: str, mtime: float):
+    """Load speaker configuration, mtime in the key reloads it when the file changes"""
+    return interface.load_speaker(speakerJson)
 
+async def generate_tts_async(text: str, filename: str, speakerJson: str = "speek.json") -> None:
     """Generate TTS audio asynchronously"""
     try:
-        # Generate audio
-        output = interface.generate(
-            config=outetts.GenerationConfig(
-                text=text,
-                speaker=speaker
+        speaker = _load_speaker(speakerJson, os.path.getmtime(speakerJson))
+
+        # One generation at a time on the shared model, off the event loop so cached requests keep being served
+        async with generation_lock:
+            output = await asyncio.to_thread(
+                interface.generate,
+                config=outetts.GenerationConfig(
+                    text=text,
+                    speaker=speaker
+                )
             )
-        )
         
-        # Save to file
-        filepath = WAV_DIR / filename
-        output.save(str(filepath))
-        
-        # Mark generation as complete
-        if text in generating:
-            generating[text].set()
+        # Save to a partial file, then atomically move it into the cache
+        partial = PARTIAL_DIR / filename
+        await asyncio.to_thread(output.save, str(partial))
+        os.replace(partial, WAV_DIR / filename)
             
     except Exception as e:
         print(f"Error generating TTS for '{text}': {e}")
-        # Clean up on error
-        if text in generating:
-            generating[text].set()
+        (PARTIAL_DIR / filename).unlink(missing_ok=True)
+    finally:
+        # Mark generation as complete, a failed one can be retried
+        event = generating.pop(filename, None)
+        if event:
+            event.set()
 
 @app.on_event("startup")
 async def startup_event():
@@ -93,28 +104,23 @@ async def get_tts(text: str = Query(..., description="Text to convert to speech"
     
     # Check if file already exists
     if filepath.exists():
-        # Return the existing WAV file
-        with open(filepath, "rb") as f:
-            wav_data = f.read()
-        
-        return Response(
-            content=wav_data,
+        # Stream the existing WAV file from disk
+        return FileResponse(
+            str(filepath),
             media_type="audio/wav",
-            headers={
-                "Content-Disposition": f"attachment; filename={filename}",
-                "Cache-Control": "public, max-age=3600"
-            }
+            filename=filename,
+            headers={"Cache-Control": "public, max-age=3600"}
         )
     
     # Check if generation is already in progress
-    if text in generating:
+    if filename in generating:
         raise HTTPException(
             status_code=503, 
             detail="Audio generation in progress, please try again later"
         )
     
     # Start generation
-    generating[text] = asyncio.Event()
+    generating[filename] = asyncio.Event()
     
     # Start async generation task
     asyncio.create_task(generate_tts_async(text, filename, speakerJson))